@@ -5,11 +5,13 @@ Converts Obsidian syntax (![[images]], [[wikilinks]]) to LaTeX, injects content
 into the template, and ensures figures are referenced from LaTeX/figures/.
 """
 
-import argparse
+import functools
+import os
 import re
 import shutil
+import tempfile
 from pathlib import Path
-from typing import List, Optional, Tuple
+from typing import Dict, List, Optional, Tuple
 
 # -----------------------------------------------------------------------------
 # Injection markers: content is placed between these in main.tex
@@ -26,6 +28,16 @@ IMAGE_ROOTS = (
     "Markdown",
 )
 IMAGE_EXTS = (".png", ".jpg", ".jpeg", ".svg", ".pdf")
+# Pandoc-escaped "\ " and "\_" in image paths
+IMAGE_PATH_UNESCAPE_PAT = re.compile(r"\\([ _])")
+# Absolute Windows path such as C:/...
+DRIVE_PATH_PAT = re.compile(r"^[A-Za-z]:/")
+# File name separators that become spaces in generated captions
+CAPTION_TRANS = str.maketrans("_-", "  ")
+
+# Batch mode (content/*.tex): below this many files, worker start-up costs more
+# than processing them in-process
+PARALLEL_MIN_FILES = 4
 
 # Unicode arrows that can break LaTeX compilation depending on engine/fonts.
 # Use \ensuremath so replacements work both in text and in existing math.
@@ -44,78 +56,186 @@ UNICODE_ARROW_TO_LATEX = {
     "⟸": r"\ensuremath{\Longleftarrow}",
     "⟺": r"\ensuremath{\Longleftrightarrow}",
 }
+# Every key is a single code point, so str.translate can do the whole swap
+ARROW_TRANS = str.maketrans(UNICODE_ARROW_TO_LATEX)
+
+
+SLUG_WS_PAT = re.compile(r"\s+")
+SLUG_STRIP_PAT = re.compile(r"[^0-9A-Za-z\-]+")
 
 
+@functools.lru_cache(maxsize=8192)
 def slugify(s: str) -> str:
     """
     Turn a heading into a LaTeX-safe label:
       "Data and info" -> "data-and-info"
+    Must stay in step with slugify() in obsidian-labels.lua, which labels the
+    headings these slugs point at.
     """
-    s = s.strip()
-    s = re.sub(r"\s+", "-", s)
-    s = re.sub(r"[^0-9A-Za-z\-]", "", s)
-    return s.lower()
+    s = SLUG_WS_PAT.sub("-", s.strip())
+    return SLUG_STRIP_PAT.sub("", s).lower()
+
+
+@functools.lru_cache(maxsize=4096)
+def image_exists(cand: str) -> bool:
+    # A real stat() keeps the filesystem's own rules (symlinked folders,
+    # case-insensitive names on Windows/macOS); the cache probes each path once
+    return Path(cand).exists()
 
 
+@functools.lru_cache(maxsize=4096)
 def normalize_image_path(img_path: str) -> str:
     """
     Resolve an image path from Markdown/attachments or Markdown to the
     LaTeX output path. All local figures are referenced as figures/<name>.
     """
     path = img_path.strip().strip("{}")
-    path = path.replace(r"\ ", " ").replace(r"\_", "_")
-    path = path.replace("\\", "/")
+    path = IMAGE_PATH_UNESCAPE_PAT.sub(r"\1", path).replace("\\", "/")
     if path.startswith(("http://", "https://")):
         return path
-    if path.startswith("/") or re.match(r"^[A-Za-z]:/", path):
+    if path.startswith("/") or DRIVE_PATH_PAT.match(path):
         return path
 
     basename = Path(path).name
+    if basename == path:
+        # Found or not, a bare file name ends up as figures/<name>
+        return f"{IMAGE_DEFAULT_ROOT}/{path}"
+
     candidates = [f"{root}/{path}" for root in IMAGE_ROOTS]
-    if basename != path:
-        candidates.extend([f"{root}/{basename}" for root in IMAGE_ROOTS])
+    candidates.extend([f"{root}/{basename}" for root in IMAGE_ROOTS])
 
     for cand in candidates:
-        if Path(cand).exists():
+        if image_exists(cand):
             # Always output figures/<name> so LaTeX finds them in LaTeX/figures/
             return f"{IMAGE_DEFAULT_ROOT}/{basename}"
     return f"{IMAGE_DEFAULT_ROOT}/{path}"
 
 
-# Catch leftover [[...]] after figures & inline-images
-LINK_PAT = re.compile(r"\[\[(.*?)\]\]", re.DOTALL)
+# Catch leftover [[...]] after figures & inline-images. Obsidian links are a
+# single line without "]", so a bounded class keeps the scan linear instead of
+# letting .*? run on to the end of the document after an unclosed "[[".
+LINK_PAT = re.compile(r"\[\[(?P<link>[^\]\n]{0,512})\]\]")
 
 CAPTION_LINE_PAT = re.compile(
     r"(?i)^(?:Fig(?:ure)?|Pic|Caption)\.?\s*[^:\n]*[:\-]\s*(.+)$"
 )
 
+# -----------------------------------------------------------------------------
+# Patterns used by process_text, compiled once at import
+# -----------------------------------------------------------------------------
+# Pandoc escapes [[ / ]] as {[}{[} / {]}{]}
+UNESCAPE_PAT = re.compile(r"\{([\[\]])\}\{\1\}")
+
+# [[file.png]] inline reference (not an embed)
+IMG_LINK_PAT = re.compile(
+    r"(?<!\!)\[\[(?P<img>[^\]\|\n]{1,512}\.(?:png|jpg|jpeg|svg|pdf))\]\]",
+    re.IGNORECASE,
+)
+
+# Embeds and wikilinks, matched in a single scan. Alternatives are tried in
+# order at each position, so embeds win over plain wikilinks:
+#   fig     ![[file.png]] followed by a "Pic ...: caption" line
+#   nocap   ![[file.png]] on its own line; other embeds fall through to link,
+#           which turns them into "!" + \hyperref
+#   img     [[file.png]] inline reference
+#   link    any other [[wikilink]], including the [[...]] of a non-image embed
+WIKI_PAT = re.compile(
+    "|".join(
+        (
+            r"(?i:^!\[\[(?P<fig>[^\]\n]{1,512})\]\]\s*\r?\n"
+            r"\s*(?P<capline>(?:Fig(?:ure)?|Pic|Caption)[^:\-\n]*[:\-][^\n]*)(?:\r?\n|$))",
+            r"(?i:^!\[\[(?P<nocap>[^\]\n]{0,512}\.(?:png|jpg|jpeg|svg|pdf))\]\]\s*(?:\r?\n|$))",
+            f"(?i:{IMG_LINK_PAT.pattern})",
+            LINK_PAT.pattern,
+        )
+    ),
+    re.MULTILINE,
+)
+
+# \label{...}: heading labels in 4b and table labels in 6
+LABEL_PAT = re.compile(r"\\label\{([^}]+)\}")
+TIGHTLIST_PAT = re.compile(r"\n\\tightlist\n?")
+LIST_END_PAT = re.compile(r"(\\end\{(?:itemize|enumerate)\})\s*\n")
+MD_H4_PAT = re.compile(r"(?m)^\\#\\#\\#\\#\s+(.+)$")
+
+# "Table slug: caption" above table -> caption before tabularx; below -> after
+TABLE_CAP_ABOVE = re.compile(
+    r"(?:(?:^|\n)(Table ([a-zA-Z0-9_-]+): ([^\n]+))(?:\n\s*)+)?"
+    r"(\\begin\{longtable\}.*?\\end\{longtable\})",
+    re.DOTALL,
+)
+TABLE_CAP_BELOW = re.compile(
+    r"(\\begin\{longtable\}.*?\\end\{longtable\})"
+    r"(?:\n\s*)+(?:^|\n)(Table ([a-zA-Z0-9_-]+): ([^\n]+))",
+    re.DOTALL,
+)
+TABLE_LANDMARK_PAT = re.compile(
+    r"\\(toprule|midrule|endfirsthead|endhead|endlastfoot|end\{longtable\})"
+)
+BRACE_PAT = re.compile(r"[{}]")
+COL_WIDTH_PAT = re.compile(r"[pmb]\{")
+
+# Stray-brace repairs in one scan: \ref{fig:}x}, \includegraphics[..]{} x},
+# \label{fig:}x}
+BRACE_FIX_PAT = re.compile(
+    r"\\(?P<cmd>ref|label)\{fig:\}(?P<key>[^}]+)\}"
+    r"|(?P<graphics>\\includegraphics\[[^]]+\])\{\}\s*(?P<path>[^}\s]+)\}"
+)
+
+# Display math \[ ... \], numbered as an equation environment
+DISPLAY_MATH_PAT = re.compile(r"\\\[(.*?)\\]", re.DOTALL)
 
+
+@functools.lru_cache(maxsize=4096)
 def tex_image_path(img_path: str) -> str:
     path = normalize_image_path(img_path)
     path = path.replace("_", r"\_")
     return path.replace(" ", r"\ ")
 
 
+@functools.lru_cache(maxsize=4096)
 def path_stem(img_path: str) -> str:
     raw = img_path.replace(r"\ ", " ")
     return Path(raw).stem
 
 
+@functools.lru_cache(maxsize=4096)
+def figure_label(img_path: str) -> str:
+    """
+    Label shared by a figure's \\label{fig:...} and every Figure~\\ref to it,
+    computed once per image path.
+    """
+    return slugify(path_stem(img_path))
+
+
+@functools.lru_cache(maxsize=4096)
 def caption_from_filename(img_path: str) -> str:
     stem = path_stem(img_path)
-    caption = stem.replace("_", " ").replace("-", " ").strip()
+    caption = stem.translate(CAPTION_TRANS).strip()
     if not caption:
         return "Figure"
     return caption[:1].upper() + caption[1:]
 
 
+def clear_caches() -> None:
+    """
+    Forget memoized image lookups and path/label results, for callers that
+    keep the module loaded while images are added or removed.
+    """
+    for cached in (
+        image_exists,
+        normalize_image_path,
+        tex_image_path,
+        path_stem,
+        figure_label,
+        caption_from_filename,
+        slugify,
+    ):
+        cached.cache_clear()
+
+
 def replace_unicode_arrows(txt: str) -> str:
-    if not txt:
-        return txt
-    if not any(ch in txt for ch in UNICODE_ARROW_TO_LATEX.keys()):
-        return txt
-    pat = re.compile("|".join(map(re.escape, UNICODE_ARROW_TO_LATEX.keys())))
-    return pat.sub(lambda m: UNICODE_ARROW_TO_LATEX[m.group(0)], txt)
+    return txt.translate(ARROW_TRANS)
 
 
 def make_figure_block(img_path: str, caption: str) -> str:
@@ -123,98 +243,99 @@ def make_figure_block(img_path: str, caption: str) -> str:
     Create a LaTeX figure environment from an image path and caption,
     ensuring actual newlines rather than literal '\\n'.
     """
-    label = slugify(path_stem(img_path))
+    label = figure_label(img_path)
     return (
-        "\n"
         "\\begin{figure}[htbp]\n"
         "    \\centering\n"
         f"    \\includegraphics[width=\\columnwidth]{{{img_path}}}\n"
         f"    \\caption{{{caption}.}}\n"
         f"    \\label{{fig:{label}}}\n"
-        "\\end{figure}\n"
-    ).strip() + "\n\n"
+        "\\end{figure}\n\n"
+    )
 
 
 def process_text(txt: str, file_slug: Optional[str] = None) -> str:
+    # Each pass below is skipped when its trigger text is absent: a substring
+    # test is a single fast C scan, far cheaper than running the regex.
+
     # 1) Un-escape Pandoc's {[}{[} -> [[ and {]}{]} -> ]]
-    txt = re.sub(r"\{\[\}\{\[\}", "[[", txt)
-    txt = re.sub(r"\{\]\}\{\]\}", "]]", txt)
+    if "{[}{[}" in txt or "{]}{]}" in txt:
+        txt = UNESCAPE_PAT.sub(r"\1\1", txt)
 
-    # 2) Embedded figures: ![[file.png]] + "Pic ...: caption"
-    fig_pat = re.compile(
-        r"(?m)^!\[\[(?P<path>[^\]]+)\]\]\s*\r?\n"
-        r"\s*(?P<capline>(?:Fig(?:ure)?|Pic|Caption)[^\n]*[:\-][^\n]*)(?:\r?\n|$)",
-        re.IGNORECASE,
-    )
+    # 2)-4) Figures, inline images and wikilinks share one scan over
+    # WIKI_PAT; each alternative dispatches to its handler below.
 
+    # 2) Embedded figures: ![[file.png]] + "Pic ...: caption"
     def fig_repl(m):
-        img_raw = m.group("path")
+        img_raw = m.group("fig")
         capline = m.group("capline").strip()
         cap_match = CAPTION_LINE_PAT.match(capline)
         if not cap_match:
-            return m.group(0)
-        cap = cap_match.group(1).strip().rstrip(".")
+            # Unusable caption: embed on its own, caption line stays as text.
+            # Re-run the embed line alone (through the last newline before the
+            # caption) through WIKI_PAT, so the no-caption figure and
+            # non-image embed paths apply to it.
+            split = m.string.rfind("\n", m.end("fig"), m.start("capline")) + 1
+            embed = WIKI_PAT.sub(wiki_repl, m.string[m.start() : split])
+            return embed + convert_links(m.string[split : m.end()])
+        cap = convert_links(cap_match.group(1).strip().rstrip("."))
         img = tex_image_path(img_raw)
         return make_figure_block(img, cap)
 
-    txt = fig_pat.sub(fig_repl, txt)
-
     # 2b) Embedded figures without explicit captions
-    fig_nocap_pat = re.compile(
-        r"(?m)^!\[\[(?P<path>[^\]]+)\]\]\s*(?:\r?\n|$)"
-    )
-
     def fig_nocap_repl(m):
-        img_raw = m.group("path")
-        if not img_raw.lower().endswith(IMAGE_EXTS):
-            return m.group(0)
+        img_raw = m.group("nocap")
         img = tex_image_path(img_raw)
         cap = caption_from_filename(img_raw)
         return make_figure_block(img, cap)
 
-    txt = fig_nocap_pat.sub(fig_nocap_repl, txt)
-
     # 3) Inline images -> Figure~\\ref{fig:...}
-    img_link_pat = re.compile(
-        r"(?<!\!)\[\[([^\]\|]+\.(?:png|jpg|jpeg|svg|pdf))\]\]",
-        re.IGNORECASE,
-    )
-
     def inline_img(m):
-        lab = slugify(Path(m.group(1).strip()).stem)
+        lab = figure_label(m.group("img").strip())
         return f"Figure~\\ref{{fig:{lab}}}"
 
-    txt = img_link_pat.sub(inline_img, txt)
-
     # 4) Other wikilinks -> \\hyperref
-    def link_repl(m):
-        inner = m.group(1).replace(r"\#", "#").replace(r"\textbar", "|").strip()
-        if "|" in inner:
-            target, alias = map(str.strip, inner.split("|", 1))
-        else:
-            target, alias = inner, None
-        if "#" in target:
-            note, heading = map(str.strip, target.split("#", 1))
-        else:
-            note, heading = target.strip(), ""
+    def hyperref(inner: str) -> str:
+        inner = inner.replace(r"\#", "#").replace(r"\textbar", "|").strip()
+        target, sep, alias = inner.partition("|")
+        alias = alias.strip() if sep else None
+        note, _, heading = target.partition("#")
+        note, heading = note.strip(), heading.strip()
         if heading:
             text = alias or heading
+            heading_slug = slugify(heading)
             if note:
-                lab = f"{slugify(note)}--{slugify(heading)}"
+                lab = f"{slugify(note)}--{heading_slug}"
             else:
                 # [[#Heading]] same-file ref: use file_slug--heading if available
-                lab = (
-                    f"{file_slug}--{slugify(heading)}" if file_slug else slugify(heading)
-                )
+                lab = f"{file_slug}--{heading_slug}" if file_slug else heading_slug
         else:
             text = alias or note
             lab = slugify(note)
         return f"\\hyperref[{lab}]{{{text}}}"
 
-    txt = LINK_PAT.sub(link_repl, txt)
+    def link_repl(m):
+        return hyperref(m.group("link"))
+
+    def convert_links(s: str) -> str:
+        # Links inside figure captions (step 2), which WIKI_PAT consumed whole
+        s = IMG_LINK_PAT.sub(inline_img, s)
+        return LINK_PAT.sub(link_repl, s)
+
+    def wiki_repl(m):
+        if m.group("fig") is not None:
+            return fig_repl(m)
+        if m.group("nocap") is not None:
+            return fig_nocap_repl(m)
+        if m.group("img") is not None:
+            return inline_img(m)
+        return link_repl(m)
+
+    if "[[" in txt:
+        txt = WIKI_PAT.sub(wiki_repl, txt)
 
     # 4b) Rewrite heading labels to include file slug for cross-references
-    if file_slug:
+    if file_slug and "\\label{" in txt:
 
         def rewrite_heading_label(m: re.Match) -> str:
             lab = m.group(1)
@@ -222,45 +343,33 @@ def process_text(txt: str, file_slug: Optional[str] = None) -> str:
                 return m.group(0)
             return f"\\label{{{file_slug}--{lab}}}"
 
-        txt = re.sub(r"\\label\{([^}]+)\}", rewrite_heading_label, txt)
+        txt = LABEL_PAT.sub(rewrite_heading_label, txt)
 
     # 4c) Remove \tightlist for normal LaTeX list spacing
-    txt = re.sub(r"\n\\tightlist\n?", "\n", txt)
+    if "\\tightlist" in txt:
+        txt = TIGHTLIST_PAT.sub("\n", txt)
 
     # 4d) Add vertical space after lists for breathing room
-    txt = re.sub(r"(\\end\{itemize\})\s*\n", r"\1\n\\bigskip\n", txt)
-    txt = re.sub(r"(\\end\{enumerate\})\s*\n", r"\1\n\\bigskip\n", txt)
+    if "\\end{itemize}" in txt or "\\end{enumerate}" in txt:
+        txt = LIST_END_PAT.sub(r"\1\n\\bigskip\n", txt)
 
     # 5) (No page-break before \\section - user prefers continuous flow)
 
     # 5b) Fix literal Markdown headings that slipped through
-    txt = re.sub(r"(?m)^\\#\\#\\#\\#\s+(.+)$", r"\\paragraph{\1}", txt)
+    if "\\#\\#\\#\\#" in txt:
+        txt = MD_H4_PAT.sub(r"\\paragraph{\1}", txt)
 
     # 6) Convert any longtable -> floating table + tabularx
-    # "Table slug: caption" above table → caption before tabularx; below → caption after tabularx
-    TABLE_CAP_ABOVE = re.compile(
-        r"(?:(?:^|\n)(Table ([a-zA-Z0-9_-]+): ([^\n]+))(?:\n\s*)+)?"
-        r"(\\begin\{longtable\}.*?\\end\{longtable\})",
-        re.DOTALL,
-    )
-    TABLE_CAP_BELOW = re.compile(
-        r"(\\begin\{longtable\}.*?\\end\{longtable\})"
-        r"(?:\n\s*)+(?:^|\n)(Table ([a-zA-Z0-9_-]+): ([^\n]+))",
-        re.DOTALL,
-    )
     table_slugs: List[str] = []
 
     def extract_braced(text: str, start: int) -> Tuple[str, int]:
+        # Only visit brace characters; the scan between them runs in the regex engine
         depth = 1
-        i = start
-        while i < len(text) and depth > 0:
-            ch = text[i]
-            if ch == "{":
-                depth += 1
-            elif ch == "}":
-                depth -= 1
-            i += 1
-        return text[start : i - 1], i
+        for m in BRACE_PAT.finditer(text, start):
+            depth += 1 if m.group(0) == "{" else -1
+            if depth == 0:
+                return text[start : m.start()], m.end()
+        return text[start : len(text) - 1], max(start, len(text))
 
     def extract_caption_and_label(block: str) -> Tuple[Optional[str], Optional[str]]:
         cap = None
@@ -271,33 +380,28 @@ def process_text(txt: str, file_slug: Optional[str] = None) -> str:
             cap_text, end_idx = extract_braced(block, cap_idx + len("\\caption{"))
             cap = cap_text.strip()
 
-        label_match = re.search(r"\\label\{([^}]+)\}", block)
+        label_match = LABEL_PAT.search(block)
         if label_match:
             label = label_match.group(1).strip()
             if cap:
-                cap = re.sub(r"\\label\{[^}]+\}", "", cap).strip()
+                cap = LABEL_PAT.sub("", cap).strip()
 
         return cap or None, label or None
 
     def normalize_col_spec(spec: str) -> str:
+        # Replace each p{..}/m{..}/b{..} column with X, copying the text between
+        # them as slices rather than one character at a time
         spec = " ".join(spec.split())
         out = []
-        i = 0
-        while i < len(spec):
-            if spec[i] in ("p", "m", "b") and i + 1 < len(spec) and spec[i + 1] == "{":
-                i += 2
-                depth = 1
-                while i < len(spec) and depth > 0:
-                    if spec[i] == "{":
-                        depth += 1
-                    elif spec[i] == "}":
-                        depth -= 1
-                    i += 1
-                out.append("X")
-                continue
-            out.append(spec[i])
-            i += 1
-        return "".join(out)
+        pos = 0
+        while True:
+            m = COL_WIDTH_PAT.search(spec, pos)
+            if not m:
+                out.append(spec[pos:])
+                return "".join(out)
+            out.append(spec[pos : m.start()])
+            out.append("X")
+            _, pos = extract_braced(spec, m.end())
 
     def build_table(block: str, cap: Optional[str], label: Optional[str], caption_above: bool) -> str:
         begin_idx = block.find("\\begin{longtable}")
@@ -316,45 +420,59 @@ def process_text(txt: str, file_slug: Optional[str] = None) -> str:
         prefix = "" if col_spec.startswith("@{}") else "@{}"
         suffix = "" if col_spec.endswith("@{}") else "@{}"
 
-        header_block = ""
-        header_match = re.search(r"\\toprule.*?\\endfirsthead", block, re.DOTALL)
-        if header_match:
-            header_block = header_match.group(0).replace("\\endfirsthead", "").strip()
-        else:
-            top_match = re.search(r"\\toprule.*?\\midrule", block, re.DOTALL)
-            if top_match:
-                header_block = top_match.group(0).strip()
+        # One pass over the block records where each rule/head/foot macro sits;
+        # header and data are then sliced out by offset
+        marks: Dict[str, List[int]] = {}
+        for lm in TABLE_LANDMARK_PAT.finditer(block):
+            marks.setdefault(lm.group(1), []).append(lm.start())
 
-        data_match = re.search(
-            r"\\endlastfoot(.*?)\\end\{longtable\}", block, re.DOTALL
-        )
-        if not data_match:
-            data_match = re.search(r"\\endhead(.*?)\\end\{longtable\}", block, re.DOTALL)
-        if data_match:
-            data_block = data_match.group(1).strip()
-        else:
-            data_block = ""
-
-        body_parts = [part for part in (header_block, data_block) if part]
-        body = "\n".join(body_parts).strip()
-        if body and "\\bottomrule" not in body:
-            body = f"{body}\n\\bottomrule"
+        def first(name: str, after: int = -1) -> int:
+            return next((pos for pos in marks.get(name, ()) if pos > after), -1)
 
-        lines = ["", "\\begin{table}[htbp]", "  \\centering"]
-        if caption_above and cap:
-            lines.append(f"  \\caption{{{cap}}}")
-            if label:
-                lines.append(f"  \\label{{{label}}}")
-        lines.append(f"  \\begin{{tabularx}}{{\\linewidth}}{{{prefix}{col_spec}{suffix}}}")
+        # Header: \toprule up to \endfirsthead, else up to and including \midrule
+        header_block = ""
+        top = first("toprule")
+        if top != -1:
+            header_end = first("endfirsthead", top)
+            if header_end == -1:
+                header_end = first("midrule", top)
+                if header_end != -1:
+                    header_end += len("\\midrule")
+            if header_end != -1:
+                header_block = block[top:header_end].strip()
+
+        # Data: after \endlastfoot, else after \endhead, up to \end{longtable}
+        data_block = ""
+        for name in ("endlastfoot", "endhead"):
+            data_start = first(name)
+            data_end = first("end{longtable}", data_start) if data_start != -1 else -1
+            if data_end != -1:
+                data_block = block[data_start + len(name) + 1 : data_end].strip()
+                break
+
+        # Both parts are already stripped, so the joined body needs no strip()
+        body = "\n".join(part for part in (header_block, data_block) if part)
+        body_line = ""
         if body:
-            lines.append(f"    {body}")
-        lines.append("  \\end{tabularx}")
-        if not caption_above and cap:
-            lines.append(f"  \\caption{{{cap}}}")
+            bottom = "" if "\\bottomrule" in body else "\n\\bottomrule"
+            body_line = f"    {body}{bottom}\n"
+
+        cap_lines = ""
+        if cap:
+            cap_lines = f"  \\caption{{{cap}}}\n"
             if label:
-                lines.append(f"  \\label{{{label}}}")
-        lines.append("\\end{table}\n")
-        return "\n".join(lines)
+                cap_lines += f"  \\label{{{label}}}\n"
+        above, below = (cap_lines, "") if caption_above else ("", cap_lines)
+        return (
+            "\n\\begin{table}[htbp]\n"
+            "  \\centering\n"
+            f"{above}"
+            f"  \\begin{{tabularx}}{{\\linewidth}}{{{prefix}{col_spec}{suffix}}}\n"
+            f"{body_line}"
+            "  \\end{tabularx}\n"
+            f"{below}"
+            "\\end{table}\n"
+        )
 
     def table_repl_above(m):
         cap_slug, cap_text = m.group(2), m.group(3)
@@ -374,39 +492,37 @@ def process_text(txt: str, file_slug: Optional[str] = None) -> str:
         cap = cap_text.strip().rstrip(".")
         return build_table(block, cap, label, caption_above=False)
 
-    # Process caption-below first (more specific), then caption-above
-    txt = TABLE_CAP_BELOW.sub(table_repl_below, txt)
-    txt = TABLE_CAP_ABOVE.sub(table_repl_above, txt)
+    # Process caption-below first (more specific), then caption-above.
+    # Without tables, table_slugs stays empty and 6b is a no-op too.
+    if "\\begin{longtable}" in txt:
+        txt = TABLE_CAP_BELOW.sub(table_repl_below, txt)
+        txt = TABLE_CAP_ABOVE.sub(table_repl_above, txt)
 
     # 6b) Replace "Table slug" in text with Table~\ref{tbl:slug} for known table slugs
-    for cap_slug in table_slugs:
-        lab = slugify(cap_slug)
+    if table_slugs:
+        # One pass for all slugs; alternatives keep table order, so a slug that
+        # prefixes another wins where it came first, as with one pass per slug
+        slug_to_lab = {cap_slug: slugify(cap_slug) for cap_slug in table_slugs}
+        alt = "|".join(map(re.escape, slug_to_lab))
         # Match "Table slug" as a word (not inside other refs/labels)
-        pat = re.compile(r"(?<![\\{])\bTable " + re.escape(cap_slug) + r"\b")
-        txt = pat.sub(f"Table~\\\\ref{{tbl:{lab}}}", txt)
+        pat = re.compile(r"(?<![\\{])\bTable (" + alt + r")\b")
+        txt = pat.sub(lambda m: f"Table~\\ref{{tbl:{slug_to_lab[m.group(1)]}}}", txt)
 
     # 7) Repair stray braces in refs, graphics & labels
-    txt = re.sub(
-        r"\\ref\{fig:\}([^}]+)\}",
-        lambda m: f"\\ref{{fig:{m.group(1)}}}",
-        txt,
-    )
-    txt = re.sub(
-        r"(\\includegraphics\[[^]]+\])\{\}\s*([^}\s]+)\}",
-        lambda m: f"{m.group(1)}{{{m.group(2)}}}",
-        txt,
-    )
-    txt = re.sub(
-        r"\\label\{fig:\}([^}]+)\}",
-        lambda m: f"\\label{{fig:{m.group(1)}}}",
-        txt,
-    )
+    def brace_fix_repl(m):
+        if m.group("graphics"):
+            return f"{m.group('graphics')}{{{m.group('path')}}}"
+        return f"\\{m.group('cmd')}{{fig:{m.group('key')}}}"
+
+    if "{fig:}" in txt or "]{}" in txt:
+        txt = BRACE_FIX_PAT.sub(brace_fix_repl, txt)
 
     # 8) Replace unicode arrows with LaTeX-safe math macros
     txt = replace_unicode_arrows(txt)
 
     # 9) Convert display math \[ ... \] to \begin{equation} ... \end{equation} for numbering
-    txt = re.sub(r"\\\[(.*?)\\]", r"\\begin{equation}\1\\end{equation}", txt, flags=re.DOTALL)
+    if "\\[" in txt:
+        txt = DISPLAY_MATH_PAT.sub(r"\\begin{equation}\1\\end{equation}", txt)
 
     return txt
 
@@ -423,36 +539,93 @@ def inject_body(template_text: str, body_text: str) -> str:
     return f"{before}{MARKER_START}\n{body}{MARKER_END}{after}"
 
 
-def fix_file(path: Path) -> None:
-    txt = path.read_text(encoding="utf-8")
-    txt = process_text(txt)
-    path.write_text(txt, encoding="utf-8")
-    print(f"Processed {path.name}")
+def write_text_atomic(path: Path, text: str) -> None:
+    """
+    Write text via a temporary file in the same directory and rename it over
+    path, so an interrupted run never leaves a truncated .tex behind.
+    """
+    # Write through symlinks (e.g. a linked LaTeX/main.tex) instead of
+    # replacing the link with a regular file
+    path = path.resolve()
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            f.write(text)
+        if path.exists():
+            shutil.copymode(path, tmp)
+        else:
+            # mkstemp creates 0600; give new files the usual umask-based mode
+            umask = os.umask(0)
+            os.umask(umask)
+            os.chmod(tmp, 0o666 & ~umask)
+        os.replace(tmp, path)
+    except BaseException:
+        os.unlink(tmp)
+        raise
 
 
-def copy_figures_to_latex(markdown_dir: str = "Markdown", latex_figures: str = "LaTeX/figures") -> int:
+def fix_file(path: Path, report: bool = True) -> str:
+    """
+    Post-process one .tex file in place and return its status line, which
+    is printed here unless report is False.
+    """
+    txt = path.read_text(encoding="utf-8")
+    new_txt = process_text(txt)
+    if new_txt != txt:
+        write_text_atomic(path, new_txt)
+    status = f"Processed {path.name}"
+    if report:
+        print(status)
+    return status
+
+
+def is_same_copy(src: Path, dst: Path) -> bool:
+    # copy2 carries the mtime over, so an unchanged source matches exactly
+    try:
+        src_st, dst_st = src.stat(), dst.stat()
+    except FileNotFoundError:
+        return False
+    return src_st.st_size == dst_st.st_size and src_st.st_mtime_ns == dst_st.st_mtime_ns
+
+
+def copy_figures_to_latex(
+    markdown_dir: str = "Markdown", latex_figures: str = "LaTeX/figures"
+) -> Tuple[int, int]:
     """
     Copy image files from Markdown/attachments and Markdown/ to LaTeX/figures.
-    Overwrites existing files. Returns the number of files copied.
+    Overwrites existing files, except copies that copy2 already made (same
+    size and mtime), which are left alone. Returns (figures found, copied).
     """
     dest = Path(latex_figures)
     dest.mkdir(parents=True, exist_ok=True)
-    count = 0
+    found = 0
+    copied = 0
     for root_name in ("attachments", ""):
         src_dir = Path(markdown_dir) / root_name if root_name else Path(markdown_dir)
-        if not src_dir.exists():
+        if not src_dir.is_dir():
             continue
-        for ext in IMAGE_EXTS:
-            for f in src_dir.glob(f"*{ext}"):
-                if f.is_file():
-                    dest_file = dest / f.name
-                    shutil.copy2(f, dest_file)
-                    count += 1
-                    print(f"  Copied {f.relative_to(markdown_dir)} -> {latex_figures}/")
-    return count
+        # One directory read for all extensions, matched case-insensitively
+        # like the figure and image-link patterns
+        with os.scandir(src_dir) as it:
+            entries = sorted(it, key=lambda e: e.name)
+        for entry in entries:
+            if not (entry.name.lower().endswith(IMAGE_EXTS) and entry.is_file()):
+                continue
+            f = Path(entry.path)
+            dest_file = dest / entry.name
+            found += 1
+            if is_same_copy(f, dest_file):
+                continue
+            shutil.copy2(f, dest_file)
+            copied += 1
+            print(f"  Copied {f.relative_to(markdown_dir)} -> {latex_figures}/")
+    return found, copied
 
 
 def main() -> None:
+    # CLI-only imports live here so `import postprocess` stays cheap
+    import argparse
+
     parser = argparse.ArgumentParser(
         description="Post-process Pandoc LaTeX output for Obsidian Markdown conversion."
     )
@@ -474,9 +647,9 @@ def main() -> None:
     args = parser.parse_args()
 
     if args.copy_figures:
-        n = copy_figures_to_latex()
-        if n:
-            print(f"Copied {n} figure(s) to LaTeX/figures/")
+        found, copied = copy_figures_to_latex()
+        if found:
+            print(f"{found} figure(s) in LaTeX/figures/ ({copied} copied)")
         else:
             print("No figures found in Markdown/ or Markdown/attachments/")
 
@@ -492,16 +665,26 @@ def main() -> None:
             template_text = Path(args.template).read_text(encoding="utf-8")
             merged = inject_body(template_text, txt)
             out_path = Path(args.output) if args.output else Path(args.template)
-            out_path.write_text(merged, encoding="utf-8")
+            write_text_atomic(out_path, merged)
             print(f"Updated {out_path}")
         else:
             out_path = Path(args.output) if args.output else Path(args.input)
-            out_path.write_text(txt, encoding="utf-8")
+            write_text_atomic(out_path, txt)
             print(f"Processed {out_path.name}")
         return
 
-    for tex in sorted(Path("content").glob("*.tex")):
-        fix_file(tex)
+    files = sorted(Path("content").glob("*.tex"))
+    if len(files) < PARALLEL_MIN_FILES:
+        for tex in files:
+            fix_file(tex)
+        return
+    # Files are independent and regex work is CPU-bound: use one process per core.
+    # Workers stay quiet; the parent prints their status lines in file order.
+    from concurrent.futures import ProcessPoolExecutor
+
+    with ProcessPoolExecutor() as ex:
+        for status in ex.map(functools.partial(fix_file, report=False), files):
+            print(status)
 
 
 if __name__ == "__main__":